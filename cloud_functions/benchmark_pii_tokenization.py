@@ -0,0 +1,113 @@
+"""
+=============================================================================
+BENCHMARK: Contributor PII Tokenization Throughput
+=============================================================================
+
+Measures rows/second of the contributor tokenization stage
+(cf_contributor_staging_to_bronze/pii_tokenization.py) on a synthetic
+multi-million-row contributors CSV, without touching GCS or BigQuery.
+
+Two numbers are reported:
+├── tokenize: tokenize_chunks() over in-memory chunks (hashing only)
+└── end-to-end: tokenize_stream() from a local CSV to a local CSV
+    (CSV parse + hashing + CSV write, the path the Cloud Function runs)
+
+USAGE:
+    python benchmark_pii_tokenization.py [--rows 5000000] [--chunk-rows 200000]
+        [--distinct-names 200000]
+=============================================================================
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'cf_contributor_staging_to_bronze'))
+
+from pii_tokenization import PII_COLUMNS, tokenize_chunks, tokenize_stream  # noqa: E402
+
+BENCHMARK_KEY = b'benchmark-only-key'
+DOMAINS = np.array(['example.com', 'mail.example.org', 'contractor.example.net'], dtype=object)
+
+
+def synthetic_chunk(start: int, rows: int, distinct_names: int,
+                    rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Build a contributors chunk shaped like the staging CSV.
+
+    Args:
+        start: First contributor number in the chunk
+        rows: Rows in the chunk
+        distinct_names: Size of the name pool names are drawn from
+        rng: Random generator
+
+    Returns:
+        DataFrame with contributor_id, name, email, created_at
+    """
+    ids = np.arange(start, start + rows)
+    names = rng.integers(0, distinct_names, size=rows)
+    return pd.DataFrame({
+        'contributor_id': pd.Series(ids).map('C{:09d}'.format),
+        'name': pd.Series(names).map('Contributor {}'.format),
+        'email': (pd.Series(ids).map('user{}'.format) + '@'
+                  + DOMAINS[ids % len(DOMAINS)]),
+        'created_at': '2025-01-01 00:00:00',
+    })
+
+
+def synthetic_chunks(rows: int, chunk_rows: int, distinct_names: int) -> List[pd.DataFrame]:
+    rng = np.random.default_rng(42)
+    return [
+        synthetic_chunk(start, min(chunk_rows, rows - start), distinct_names, rng)
+        for start in range(0, rows, chunk_rows)
+    ]
+
+
+def benchmark(rows: int, chunk_rows: int, distinct_names: int) -> None:
+    pii_columns = PII_COLUMNS['contributors']
+    chunks = synthetic_chunks(rows, chunk_rows, distinct_names)
+
+    start = time.perf_counter()
+    for _ in tokenize_chunks((chunk.copy() for chunk in chunks), pii_columns, BENCHMARK_KEY):
+        pass
+    tokenize_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, 'contributors.csv')
+        target_path = os.path.join(tmp_dir, 'contributors_tokenized.csv')
+        for chunk_number, chunk in enumerate(chunks):
+            chunk.to_csv(source_path, mode='a', header=chunk_number == 0, index=False)
+        del chunks
+
+        start = time.perf_counter()
+        with open(source_path, newline='') as source, \
+                open(target_path, 'w', newline='') as target:
+            written, _ = tokenize_stream(source, target, pii_columns, BENCHMARK_KEY, chunk_rows)
+        stream_seconds = time.perf_counter() - start
+        source_mb = os.path.getsize(source_path) / 1e6
+
+    print(f"rows:        {rows:,} ({source_mb:,.0f} MB CSV, chunk_rows={chunk_rows:,}, "
+          f"distinct names={distinct_names:,})")
+    print(f"tokenize:    {tokenize_seconds:8.2f}s  {rows / tokenize_seconds:12,.0f} rows/s")
+    print(f"end-to-end:  {stream_seconds:8.2f}s  {written / stream_seconds:12,.0f} rows/s")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark contributor PII tokenization")
+    parser.add_argument('--rows', type=int, default=5000000, help="Rows to generate")
+    parser.add_argument('--chunk-rows', type=int, default=200000, help="Rows per chunk")
+    parser.add_argument('--distinct-names', type=int, default=200000,
+                        help="Distinct contributor names in the data")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    benchmark(args.rows, args.chunk_rows, args.distinct_names)
@@ -36,11 +36,15 @@ PROCESSING_FREQUENCY: Real-time (event-driven)
 import json
 import os
 import logging
+import re
 from datetime import datetime
-from google.cloud import bigquery
+from google.api_core.exceptions import BadRequest, Conflict
+from google.cloud import bigquery, storage
 from google.cloud.exceptions import NotFound
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+from pii_tokenization import PII_COLUMNS, tokenize_staging_file
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +55,24 @@ PROJECT_ID = os.environ.get('PROJECT_ID')
 DATASET_ID = os.environ.get('DATASET_ID', 'contributor_bronze')
 TABLE_MAPPING = json.loads(os.environ.get('TABLE_MAPPING', '{}'))
 
+# Failure handling: rows BigQuery may skip per file before the load fails,
+# and where poison files are moved for replay. PROCESSING_BUCKET has no
+# trigger; without it quarantined objects land in the triggering bucket and
+# each one costs an extra (skipped) invocation.
+MAX_BAD_RECORDS = int(os.environ.get('MAX_BAD_RECORDS', '10'))
+PROCESSING_BUCKET = os.environ.get('PROCESSING_BUCKET')
+QUARANTINE_PREFIX = os.environ.get('QUARANTINE_PREFIX', 'quarantine/')
+REASON_SUFFIX = '.reason.json'
+MAX_LOGGED_LOAD_ERRORS = 20
+
+# PROCESSING_BUCKET prefix for PII-tokenized copies of files awaiting load
+TOKENIZED_PREFIX = os.environ.get('TOKENIZED_PREFIX', 'tokenized/')
+
+# Largest file tokenized in-function. Tokenization runs at ~80k rows/s
+# (~6 MB/s) locally and slower from GCS; 1 GB (~13M rows) leaves headroom
+# for the load job inside the 540s function timeout.
+MAX_TOKENIZE_BYTES = int(os.environ.get('MAX_TOKENIZE_BYTES', str(1024 ** 3)))
+
 # LINEAGE METADATA CONSTANTS
 LINEAGE_METADATA = {
     'pipeline_name': 'contributor-staging-to-bronze',
@@ -75,6 +97,20 @@ def main(event: Dict[str, Any], context: Any) -> None:
     - PROCESSING_TYPE: file-to-table ingestion
     - DOWNSTREAM_IMPACT: Triggers silver layer processing
     
+    PII HANDLING:
+    - Files for tables in PII_COLUMNS are streamed through tokenization into
+      TOKENIZED_PREFIX in PROCESSING_BUCKET and the tokenized copy is loaded
+      instead of the raw file
+    - Files over MAX_TOKENIZE_BYTES are quarantined to be split, since they
+      could not be tokenized within the function timeout
+    
+    FAILURE HANDLING:
+    - Up to MAX_BAD_RECORDS malformed rows are skipped and logged per file
+    - Files BigQuery rejects are moved to QUARANTINE_PREFIX with a reason
+      record and the event is acknowledged so retries stop
+    - Transient errors are re-raised so the event is retried; the load job ID
+      is derived from the event ID, so a retry reuses a load it already started
+    
     Args:
         event: Cloud Storage event data
         context: Cloud Function context
@@ -86,6 +122,16 @@ def main(event: Dict[str, Any], context: Any) -> None:
         bucket_name = event['bucket']
         file_name = event['name']
         
+        # Quarantined files and reason records are replayed explicitly
+        if file_name.startswith(QUARANTINE_PREFIX):
+            logger.info(f"Skipping quarantined object: gs://{bucket_name}/{file_name}")
+            return
+        
+        # Tokenized copies are loaded by the invocation that wrote them
+        if file_name.startswith(TOKENIZED_PREFIX):
+            logger.info(f"Skipping tokenized object: gs://{bucket_name}/{file_name}")
+            return
+        
         # LOG LINEAGE: Start of data flow
         lineage_context = {
             'execution_id': context.eventId if context else 'unknown',
@@ -118,6 +164,7 @@ def main(event: Dict[str, Any], context: Any) -> None:
             source_format=bigquery.SourceFormat.CSV,
             skip_leading_rows=1,  # Assume CSV has header
             autodetect=True,      # Auto-detect schema
+            max_bad_records=MAX_BAD_RECORDS,
             write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
             create_disposition=bigquery.CreateDisposition.CREATE_IF_NEEDED
         )
@@ -125,18 +172,59 @@ def main(event: Dict[str, Any], context: Any) -> None:
         # Add Datastream metadata fields if not present
         add_datastream_metadata_fields(job_config)
         
+        # Tokenize PII columns so raw values in this file never reach bronze
+        load_bucket_name = bucket_name
+        load_file_name = file_name
+        tokenization_stats = None
+        if table_name in PII_COLUMNS and int(event.get('size', 0)) > MAX_TOKENIZE_BYTES:
+            # Would time out and be retried for days; quarantine it to be split instead
+            quarantine_file(
+                bucket_name, file_name, table_name, job_config, None,
+                f"File is {event['size']} bytes, over MAX_TOKENIZE_BYTES={MAX_TOKENIZE_BYTES}; "
+                f"split it and re-upload",
+                context.eventId if context else 'unknown'
+            )
+            return
+        if table_name in PII_COLUMNS:
+            load_bucket_name = PROCESSING_BUCKET or bucket_name
+            load_file_name = f"{TOKENIZED_PREFIX}{file_name}"
+            try:
+                tokenization_stats = tokenize_staging_file(
+                    bucket_name, file_name, table_name, load_bucket_name, load_file_name,
+                    max_bad_lines=MAX_BAD_RECORDS
+                )
+            except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+                quarantine_file(
+                    bucket_name, file_name, table_name, job_config, None,
+                    str(e), context.eventId if context else 'unknown'
+                )
+                return
+            # Malformed CSV lines skipped here count against the load's allowance
+            job_config.max_bad_records = MAX_BAD_RECORDS - tokenization_stats['bad_lines']
+        
         # Construct source URI
-        source_uri = f"gs://{bucket_name}/{file_name}"
+        source_uri = f"gs://{load_bucket_name}/{load_file_name}"
         
-        # Start load job
-        load_job = client.load_table_from_uri(
-            source_uri,
-            table_ref,
-            job_config=job_config
+        # Start load job; retried events reuse the job they already started
+        load_job = start_load_job(
+            client, source_uri, table_ref, job_config,
+            context.eventId if context else None
         )
         
-        # Wait for job completion
-        load_job.result()
+        # Wait for job completion; rejected files go to quarantine
+        try:
+            load_job.result()
+        except BadRequest as e:
+            quarantine_file(
+                load_bucket_name, load_file_name, table_name, job_config, load_job,
+                str(e), context.eventId if context else 'unknown'
+            )
+            return
+        
+        if tokenization_stats:
+            storage.Client(project=PROJECT_ID).bucket(load_bucket_name).blob(load_file_name).delete()
+        
+        rejected_rows = summarize_load_errors(load_job.errors)
         
         # LOG LINEAGE: Successful completion
         destination_table = client.get_table(table_ref)
@@ -149,6 +237,8 @@ def main(event: Dict[str, Any], context: Any) -> None:
             'source_uri': f"gs://{bucket_name}/{file_name}",
             'destination_table': f"{PROJECT_ID}.{DATASET_ID}.{table_name}",
             'rows_processed': load_job.output_rows,
+            'rejected_rows': rejected_rows,
+            'pii_tokenization': tokenization_stats,
             'total_rows_in_table': destination_table.num_rows,
             'execution_duration_seconds': execution_duration,
             'execution_end': execution_end.isoformat(),
@@ -162,12 +252,129 @@ def main(event: Dict[str, Any], context: Any) -> None:
         logger.info(f"Successfully loaded {load_job.output_rows} rows into "
                    f"{DATASET_ID}.{table_name}. "
                    f"Total rows in table: {destination_table.num_rows}")
+        if rejected_rows:
+            logger.warning(f"Skipped {len(load_job.errors)} bad rows in "
+                           f"gs://{bucket_name}/{file_name}")
         
     except Exception as e:
         logger.error(f"Error processing file {file_name}: {str(e)}")
         raise
 
 
+def start_load_job(client: bigquery.Client, source_uri: str,
+                   table_ref: bigquery.TableReference, job_config: bigquery.LoadJobConfig,
+                   event_id: Optional[str]) -> bigquery.LoadJob:
+    """
+    Start the load job for a file under a job ID derived from the triggering
+    event. A redelivered event gets a Conflict for the job its first delivery
+    started and reuses that job instead of appending the file a second time.
+    
+    Args:
+        client: BigQuery client
+        source_uri: GCS URI of the file to load
+        table_ref: Destination table
+        job_config: Load job configuration
+        event_id: Cloud Function event ID, or None to let BigQuery pick the job ID
+        
+    Returns:
+        The started load job, or the one a previous delivery started
+    """
+    job_id = None
+    if event_id:
+        job_id = re.sub(r'[^a-zA-Z0-9_-]', '_',
+                        f"{table_ref.dataset_id}_{table_ref.table_id}_{event_id}")
+    
+    try:
+        return client.load_table_from_uri(
+            source_uri,
+            table_ref,
+            job_id=job_id,
+            job_config=job_config
+        )
+    except Conflict:
+        logger.warning(f"Load job {job_id} already exists; reusing it for redelivered event")
+        # get_job needs the location for jobs in regional datasets
+        location = client.get_dataset(table_ref.dataset_id).location
+        return client.get_job(job_id, location=location)
+
+
+def summarize_load_errors(errors: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Trim BigQuery load job errors down to the rejected-row details worth logging.
+    
+    Args:
+        errors: Error dicts from a load job (reason, location, message)
+        
+    Returns:
+        At most MAX_LOGGED_LOAD_ERRORS error dicts
+    """
+    return [
+        {
+            'reason': error.get('reason'),
+            'location': error.get('location'),
+            'message': error.get('message')
+        }
+        for error in (errors or [])[:MAX_LOGGED_LOAD_ERRORS]
+    ]
+
+
+def quarantine_file(bucket_name: str, file_name: str, table_name: str,
+                    job_config: bigquery.LoadJobConfig, load_job: Optional[bigquery.LoadJob],
+                    reason: str, execution_id: str) -> None:
+    """
+    Move a file BigQuery rejected under QUARANTINE_PREFIX in PROCESSING_BUCKET
+    next to a reason record.
+    The reason record keeps the load configuration so that
+    replay_quarantine.py can re-ingest the file once it has been fixed.
+    Raw files that failed tokenization are marked not replayable, since
+    replaying them would load untokenized PII; they are re-uploaded instead.
+    
+    Args:
+        bucket_name: GCS bucket holding the file
+        file_name: File name
+        table_name: BigQuery table the file was loaded into
+        job_config: Load job configuration used for the failed load
+        load_job: Failed BigQuery load job, or None if the file failed tokenization
+        reason: Error message the load failed with
+        execution_id: Cloud Function event ID
+    """
+    storage_client = storage.Client(project=PROJECT_ID)
+    bucket = storage_client.bucket(bucket_name)
+    quarantine_bucket = storage_client.bucket(PROCESSING_BUCKET or bucket_name)
+    quarantine_name = f"{QUARANTINE_PREFIX}{file_name}"
+    
+    reason_record = {
+        'execution_id': execution_id,
+        'status': 'QUARANTINED',
+        'pipeline_name': LINEAGE_METADATA['pipeline_name'],
+        'source_uri': f"gs://{bucket_name}/{file_name}",
+        'quarantine_uri': f"gs://{quarantine_bucket.name}/{quarantine_name}",
+        'destination_table': f"{PROJECT_ID}.{DATASET_ID}.{table_name}",
+        'table_name': table_name,
+        'reason': reason,
+        'load_job_id': load_job.job_id if load_job else None,
+        'load_errors': summarize_load_errors(load_job.errors if load_job else None),
+        'job_config': job_config.to_api_repr(),
+        'replayable': table_name not in PII_COLUMNS or file_name.startswith(TOKENIZED_PREFIX),
+        'quarantined_at': datetime.utcnow().isoformat()
+    }
+    
+    try:
+        bucket.copy_blob(bucket.blob(file_name), quarantine_bucket, quarantine_name)
+    except NotFound:
+        # A previous delivery of this event already moved the file
+        logger.warning(f"File already quarantined: gs://{bucket_name}/{file_name}")
+        return
+    
+    quarantine_bucket.blob(f"{quarantine_name}{REASON_SUFFIX}").upload_from_string(
+        json.dumps(reason_record, indent=2),
+        content_type='application/json'
+    )
+    bucket.blob(file_name).delete()
+    
+    logger.error(f"LINEAGE_QUARANTINED: {json.dumps(reason_record)}")
+
+
 def determine_table_name(file_name: str) -> str:
     """
     Determine target BigQuery table based on file name.
@@ -0,0 +1,298 @@
+"""
+=============================================================================
+PII TOKENIZATION: Contributor Staging Files
+=============================================================================
+
+Replaces raw PII in contributor staging files with deterministic keyed
+tokens before they are loaded into contributor_bronze. Rows written by the
+contributor_db Datastream stream are not covered and still hold raw values.
+
+TOKEN FORMATS:
+├── keyed_hash: keyed BLAKE2b-128 of the normalized value, as hex
+│   (TRIM(UPPER(name)) semantics, so silver dedup still holds)
+└── email: keyed BLAKE2b-128 of the local part + original domain
+    (format-preserving, so domain analytics still work)
+
+The same value always yields the same token for a given key, so joins and
+distinct counts across loads keep working.
+
+Silver computes name_valid/email_valid from the bronze value, and every token
+would pass those checks. The checks are therefore applied to the raw value
+here and values that fail them are blanked, which silver flags as invalid
+exactly as it did for the raw value.
+
+PROCESSING:
+- Streams the staging CSV from GCS in chunks of TOKENIZE_CHUNK_ROWS rows
+  and streams the tokenized CSV back, so memory is bounded by chunk size
+- Hashes each distinct value in a chunk once (pd.factorize) and maps the
+  tokens back with a vectorized take
+- Reuses one keyed hash state per column chunk instead of re-keying per
+  value; keyed BLAKE2b is a MAC in its own right and ~2.5x faster than
+  HMAC-SHA256 per value in CPython
+
+DATA CLASSIFICATION: Restricted input → Internal output
+=============================================================================
+"""
+
+import csv
+import hashlib
+import itertools
+import os
+import logging
+from typing import Dict, Any, IO, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from google.cloud import storage
+from google.cloud.exceptions import NotFound
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ID = os.environ.get('PROJECT_ID')
+
+# Key comes from Secret Manager via the function's secret environment variables
+PII_TOKENIZATION_KEY = os.environ.get('PII_TOKENIZATION_KEY', '')
+TOKENIZE_CHUNK_ROWS = int(os.environ.get('TOKENIZE_CHUNK_ROWS', '200000'))
+TOKEN_DIGEST_SIZE = 16
+
+# Validity rules from contributor_silver.transform_contributors
+# (sql/bronze_to_silver.sql); keep in sync
+SILVER_EMAIL_PATTERN = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+SILVER_MIN_NAME_LENGTH = 2
+
+# PII columns per bronze table and the token format applied to each
+PII_COLUMNS = {
+    'contributors': {
+        'name': 'keyed_hash',
+        'email': 'email',
+    },
+}
+
+
+def _hash_values(values: Iterable[str], key: bytes) -> list:
+    """
+    Keyed-hash each value from a single pre-keyed BLAKE2b state.
+
+    Args:
+        values: Normalized strings to hash
+        key: Tokenization key (at most 64 bytes)
+
+    Returns:
+        Hex digests, in input order
+    """
+    keyed = hashlib.blake2b(key=key, digest_size=TOKEN_DIGEST_SIZE)
+    tokens = []
+    for value in values:
+        mac = keyed.copy()
+        mac.update(value.encode('utf-8'))
+        tokens.append(mac.hexdigest())
+    return tokens
+
+
+def _tokenize_uniques(uniques: np.ndarray, token_format: str, key: bytes) -> np.ndarray:
+    """
+    Tokenize the distinct values of a column.
+
+    Args:
+        uniques: Distinct raw values
+        token_format: 'keyed_hash' or 'email'
+        key: Tokenization key
+
+    Returns:
+        Tokens aligned with uniques
+    """
+    if len(uniques) == 0:
+        # Empty or all-missing column; str.rpartition would return no columns
+        return np.array([], dtype=object)
+
+    raw = pd.Series(uniques, dtype=object)
+    if token_format == 'email':
+        valid = raw.str.fullmatch(SILVER_EMAIL_PATTERN).astype(bool)
+        normalized = raw.str.strip().str.lower()
+        parts = normalized.str.rpartition('@')
+        has_domain = parts[1] == '@'
+        local = parts[0].where(has_domain, normalized)
+        tokens = pd.Series(_hash_values(local, key), index=normalized.index)
+        tokens = tokens.where(~has_domain, tokens + '@' + parts[2])
+    elif token_format == 'keyed_hash':
+        valid = raw.str.strip().str.len() >= SILVER_MIN_NAME_LENGTH
+        normalized = raw.str.strip().str.upper()
+        tokens = pd.Series(_hash_values(normalized, key), index=normalized.index)
+    else:
+        raise ValueError(f"Unknown token format: {token_format}")
+
+    # Values silver would reject are blanked so they stay invalid after hashing
+    return tokens.where(valid, '').to_numpy(dtype=object)
+
+
+def tokenize_column(values: pd.Series, token_format: str, key: bytes) -> pd.Series:
+    """
+    Tokenize a column, hashing each distinct value once.
+
+    Args:
+        values: Raw string column
+        token_format: 'keyed_hash' or 'email'
+        key: Tokenization key
+
+    Returns:
+        Tokenized column with the same index
+    """
+    codes, uniques = pd.factorize(values)
+    tokens = _tokenize_uniques(np.asarray(uniques, dtype=object), token_format, key)
+    # factorize marks missing values with -1; they map to an empty string
+    tokens = np.append(tokens, '')
+    return pd.Series(tokens[codes], index=values.index)
+
+
+def tokenize_chunks(chunks: Iterable[pd.DataFrame], pii_columns: Dict[str, str],
+                    key: bytes) -> Iterator[pd.DataFrame]:
+    """
+    Tokenize the PII columns of each chunk as it streams through.
+
+    Args:
+        chunks: DataFrames read with dtype=str
+        pii_columns: Column name to token format
+        key: Tokenization key
+
+    Yields:
+        Tokenized DataFrames
+    """
+    for chunk in chunks:
+        for column, token_format in pii_columns.items():
+            if column in chunk.columns:
+                chunk[column] = tokenize_column(chunk[column], token_format, key)
+        yield chunk
+
+
+def tokenize_stream(source: IO[str], target: IO[str], pii_columns: Dict[str, str],
+                    key: bytes, chunk_rows: int = TOKENIZE_CHUNK_ROWS,
+                    max_bad_lines: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Read a CSV from source in chunks, tokenize it and write it to target.
+
+    Records whose field count differs from the header are skipped and
+    counted; ParserError is raised once more than max_bad_lines were skipped.
+    Records are split with the csv module rather than pd.read_csv, which
+    takes a first row with an extra field as an implicit index and, when
+    reading in chunks, truncates extra fields at chunk boundaries.
+
+    Args:
+        source: Text stream of the raw CSV (with header)
+        target: Text stream for the tokenized CSV
+        pii_columns: Column name to token format
+        key: Tokenization key
+        chunk_rows: Rows held in memory at a time
+        max_bad_lines: Malformed lines to skip, or None to fail on the first
+
+    Returns:
+        Tuple of (rows written, malformed lines skipped)
+    """
+    reader = csv.reader(source)
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    except csv.Error as e:
+        raise pd.errors.ParserError(f"Line {reader.line_num}: {str(e)}") from e
+
+    bad_lines = 0
+
+    def well_formed_records() -> Iterator[List[str]]:
+        nonlocal bad_lines
+        try:
+            for record in reader:
+                if len(record) == len(header):
+                    yield record
+                elif record:
+                    # Blank lines are skipped, as pd.read_csv does
+                    bad_lines += 1
+                    if max_bad_lines is None or bad_lines > max_bad_lines:
+                        raise pd.errors.ParserError(
+                            f"Line {reader.line_num}: expected {len(header)} fields, "
+                            f"saw {len(record)}; {bad_lines} malformed lines exceed "
+                            f"max_bad_records={max_bad_lines or 0}"
+                        )
+        except csv.Error as e:
+            raise pd.errors.ParserError(f"Line {reader.line_num}: {str(e)}") from e
+
+    def read_chunks() -> Iterator[pd.DataFrame]:
+        records = well_formed_records()
+        while True:
+            batch = list(itertools.islice(records, chunk_rows))
+            if not batch:
+                return
+            yield pd.DataFrame(batch, columns=header, dtype=str)
+
+    # Header is written up front so header-only files still load
+    pd.DataFrame(columns=header).to_csv(target, index=False)
+    rows = 0
+    for chunk in tokenize_chunks(read_chunks(), pii_columns, key):
+        chunk.to_csv(target, header=False, index=False)
+        rows += len(chunk)
+    return rows, bad_lines
+
+
+def _tokenize_blob(source_blob: storage.Blob, output_blob: storage.Blob,
+                   pii_columns: Dict[str, str], key: bytes,
+                   max_bad_lines: Optional[int]) -> Tuple[int, int]:
+    """
+    Run tokenize_stream between two GCS objects, removing the output on failure.
+
+    Returns:
+        Tuple of (rows written, malformed lines skipped)
+    """
+    try:
+        with source_blob.open('r', encoding='utf-8', newline='') as source, \
+                output_blob.open('w', encoding='utf-8', newline='',
+                                 content_type='text/csv') as target:
+            return tokenize_stream(source, target, pii_columns, key,
+                                   max_bad_lines=max_bad_lines)
+    except Exception:
+        # Closing the writer on error still commits whatever was written
+        try:
+            output_blob.delete()
+        except NotFound:
+            pass
+        raise
+
+
+def tokenize_staging_file(bucket_name: str, file_name: str, table_name: str,
+                          output_bucket_name: str, output_name: str,
+                          max_bad_lines: int = 0) -> Dict[str, Any]:
+    """
+    Stream a staging CSV through tokenization into a new object.
+
+    Args:
+        bucket_name: GCS bucket name
+        file_name: Raw staging file name
+        table_name: BigQuery table the file is destined for
+        output_bucket_name: Bucket for the tokenized CSV (no function trigger)
+        output_name: Object name for the tokenized CSV
+        max_bad_lines: Malformed CSV lines to skip before raising ParserError
+
+    Returns:
+        Tokenization stats for lineage logging
+    """
+    if not PII_TOKENIZATION_KEY:
+        raise RuntimeError("PII_TOKENIZATION_KEY is not set; refusing to load raw PII")
+
+    pii_columns = PII_COLUMNS[table_name]
+    # BLAKE2b keys are limited to 64 bytes; derive a fixed-size key from the secret
+    key = hashlib.sha256(PII_TOKENIZATION_KEY.encode('utf-8')).digest()
+
+    storage_client = storage.Client(project=PROJECT_ID)
+    source_blob = storage_client.bucket(bucket_name).blob(file_name)
+    output_blob = storage_client.bucket(output_bucket_name).blob(output_name)
+
+    rows, bad_lines = _tokenize_blob(source_blob, output_blob, pii_columns, key,
+                                     max_bad_lines)
+
+    stats = {
+        'tokenized_uri': f"gs://{output_bucket_name}/{output_name}",
+        'tokenized_rows': rows,
+        'tokenized_columns': sorted(pii_columns),
+        'bad_lines': bad_lines,
+    }
+    logger.info(f"Tokenized {rows} rows of gs://{bucket_name}/{file_name}, "
+                f"skipped {bad_lines} malformed lines")
+    return stats
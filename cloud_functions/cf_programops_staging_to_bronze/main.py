@@ -1,10 +1,13 @@
 import json
 import os
 import logging
-from google.cloud import bigquery
+import re
+from datetime import datetime
+from google.api_core.exceptions import BadRequest, Conflict
+from google.cloud import bigquery, storage
 from google.cloud.exceptions import NotFound
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,10 +18,22 @@ PROJECT_ID = os.environ.get('PROJECT_ID')
 DATASET_ID = os.environ.get('DATASET_ID', 'programops_bronze')
 TABLE_MAPPING = json.loads(os.environ.get('TABLE_MAPPING', '{}'))
 
+# Failure handling: rows BigQuery may skip per file before the load fails,
+# and where poison files are moved for replay. PROCESSING_BUCKET has no
+# trigger; without it quarantined objects land in the triggering bucket and
+# each one costs an extra (skipped) invocation.
+MAX_BAD_RECORDS = int(os.environ.get('MAX_BAD_RECORDS', '10'))
+PROCESSING_BUCKET = os.environ.get('PROCESSING_BUCKET')
+QUARANTINE_PREFIX = os.environ.get('QUARANTINE_PREFIX', 'quarantine/')
+REASON_SUFFIX = '.reason.json'
+MAX_LOGGED_LOAD_ERRORS = 20
+
 def main(event: Dict[str, Any], context: Any) -> None:
     """
     Cloud Function triggered by GCS object finalization.
     Loads program ops staging files into BigQuery bronze dataset.
+    Files BigQuery rejects are moved to QUARANTINE_PREFIX with a reason
+    record and the event is acknowledged so retries stop.
     
     Args:
         event: Cloud Storage event data
@@ -29,6 +44,11 @@ def main(event: Dict[str, Any], context: Any) -> None:
         bucket_name = event['bucket']
         file_name = event['name']
         
+        # Quarantined files and reason records are replayed explicitly
+        if file_name.startswith(QUARANTINE_PREFIX):
+            logger.info(f"Skipping quarantined object: gs://{bucket_name}/{file_name}")
+            return
+        
         logger.info(f"Processing file: gs://{bucket_name}/{file_name}")
         
         # Initialize BigQuery client
@@ -45,6 +65,7 @@ def main(event: Dict[str, Any], context: Any) -> None:
         
         # Configure load job based on file type
         job_config = configure_load_job(file_name)
+        job_config.max_bad_records = MAX_BAD_RECORDS
         
         # Add Datastream metadata fields if not present
         add_datastream_metadata_fields(job_config)
@@ -52,27 +73,149 @@ def main(event: Dict[str, Any], context: Any) -> None:
         # Construct source URI
         source_uri = f"gs://{bucket_name}/{file_name}"
         
-        # Start load job
-        load_job = client.load_table_from_uri(
-            source_uri,
-            table_ref,
-            job_config=job_config
+        # Start load job; retried events reuse the job they already started
+        load_job = start_load_job(
+            client, source_uri, table_ref, job_config,
+            context.eventId if context else None
         )
         
-        # Wait for job completion
-        load_job.result()
+        # Wait for job completion; rejected files go to quarantine
+        try:
+            load_job.result()
+        except BadRequest as e:
+            quarantine_file(
+                bucket_name, file_name, table_name, job_config, load_job,
+                str(e), context.eventId if context else 'unknown'
+            )
+            return
         
         # Log success
         destination_table = client.get_table(table_ref)
         logger.info(f"Successfully loaded {load_job.output_rows} rows into "
                    f"{DATASET_ID}.{table_name}. "
                    f"Total rows in table: {destination_table.num_rows}")
+        if load_job.errors:
+            logger.warning(f"Skipped {len(load_job.errors)} bad rows in "
+                           f"gs://{bucket_name}/{file_name}: "
+                           f"{json.dumps(summarize_load_errors(load_job.errors))}")
         
     except Exception as e:
         logger.error(f"Error processing file {file_name}: {str(e)}")
         raise
 
 
+def start_load_job(client: bigquery.Client, source_uri: str,
+                   table_ref: bigquery.TableReference, job_config: bigquery.LoadJobConfig,
+                   event_id: Optional[str]) -> bigquery.LoadJob:
+    """
+    Start the load job for a file under a job ID derived from the triggering
+    event. A redelivered event gets a Conflict for the job its first delivery
+    started and reuses that job instead of appending the file a second time.
+    
+    Args:
+        client: BigQuery client
+        source_uri: GCS URI of the file to load
+        table_ref: Destination table
+        job_config: Load job configuration
+        event_id: Cloud Function event ID, or None to let BigQuery pick the job ID
+        
+    Returns:
+        The started load job, or the one a previous delivery started
+    """
+    job_id = None
+    if event_id:
+        job_id = re.sub(r'[^a-zA-Z0-9_-]', '_',
+                        f"{table_ref.dataset_id}_{table_ref.table_id}_{event_id}")
+    
+    try:
+        return client.load_table_from_uri(
+            source_uri,
+            table_ref,
+            job_id=job_id,
+            job_config=job_config
+        )
+    except Conflict:
+        logger.warning(f"Load job {job_id} already exists; reusing it for redelivered event")
+        # get_job needs the location for jobs in regional datasets
+        location = client.get_dataset(table_ref.dataset_id).location
+        return client.get_job(job_id, location=location)
+
+
+def summarize_load_errors(errors: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Trim BigQuery load job errors down to the rejected-row details worth logging.
+    
+    Args:
+        errors: Error dicts from a load job (reason, location, message)
+        
+    Returns:
+        At most MAX_LOGGED_LOAD_ERRORS error dicts
+    """
+    return [
+        {
+            'reason': error.get('reason'),
+            'location': error.get('location'),
+            'message': error.get('message')
+        }
+        for error in (errors or [])[:MAX_LOGGED_LOAD_ERRORS]
+    ]
+
+
+def quarantine_file(bucket_name: str, file_name: str, table_name: str,
+                    job_config: bigquery.LoadJobConfig, load_job: bigquery.LoadJob,
+                    reason: str, execution_id: str) -> None:
+    """
+    Move a file BigQuery rejected under QUARANTINE_PREFIX in PROCESSING_BUCKET
+    next to a reason record.
+    The reason record keeps the load configuration so that
+    replay_quarantine.py can re-ingest the file once it has been fixed.
+    
+    Args:
+        bucket_name: GCS bucket holding the file
+        file_name: File name
+        table_name: BigQuery table the file was loaded into
+        job_config: Load job configuration used for the failed load
+        load_job: Failed BigQuery load job
+        reason: Error message the load failed with
+        execution_id: Cloud Function event ID
+    """
+    storage_client = storage.Client(project=PROJECT_ID)
+    bucket = storage_client.bucket(bucket_name)
+    quarantine_bucket = storage_client.bucket(PROCESSING_BUCKET or bucket_name)
+    quarantine_name = f"{QUARANTINE_PREFIX}{file_name}"
+    
+    reason_record = {
+        'execution_id': execution_id,
+        'status': 'QUARANTINED',
+        'pipeline_name': 'programops-staging-to-bronze',
+        'source_uri': f"gs://{bucket_name}/{file_name}",
+        'quarantine_uri': f"gs://{quarantine_bucket.name}/{quarantine_name}",
+        'destination_table': f"{PROJECT_ID}.{DATASET_ID}.{table_name}",
+        'table_name': table_name,
+        'reason': reason,
+        'load_job_id': load_job.job_id,
+        'load_errors': summarize_load_errors(load_job.errors),
+        'job_config': job_config.to_api_repr(),
+        'replayable': True,
+        'quarantined_at': datetime.utcnow().isoformat()
+    }
+    
+    try:
+        bucket.copy_blob(bucket.blob(file_name), quarantine_bucket, quarantine_name)
+    except NotFound:
+        # A previous delivery of this event already moved the file
+        logger.warning(f"File already quarantined: gs://{bucket_name}/{file_name}")
+        return
+    
+    quarantine_bucket.blob(f"{quarantine_name}{REASON_SUFFIX}").upload_from_string(
+        json.dumps(reason_record, indent=2),
+        content_type='application/json'
+    )
+    bucket.blob(file_name).delete()
+    
+    logger.error(f"LINEAGE_QUARANTINED: {json.dumps(reason_record)}")
+
+
 def configure_load_job(file_name: str) -> bigquery.LoadJobConfig:
     """
     Configure load job based on file type and format.
@@ -0,0 +1,272 @@
+"""
+=============================================================================
+OPERATIONS SCRIPT: Replay Quarantined Staging Files into Bronze
+=============================================================================
+
+The staging-to-bronze Cloud Functions move files BigQuery rejects to
+gs://{PROCESSING_BUCKET}/{QUARANTINE_PREFIX}{file_name} and write a reason record
+next to them ({file_name}.reason.json) holding the target table and the
+load job configuration that failed.
+
+Once the quarantined files have been fixed in place, this script
+re-ingests them:
+1. List reason records under the quarantine prefix
+2. Group files by the destination table recorded at quarantine time and
+   load configuration; records outside --dataset are refused
+3. Load each group in batches of up to --batch-size URIs per load job,
+   running --max-workers load jobs in parallel
+4. Bisect failed batches to isolate files that are still broken
+5. Delete quarantined files (and their reason records) once loaded
+
+Records not marked "replayable": true (raw contributor files that failed
+PII tokenization) are skipped; fix and re-upload those to the staging bucket.
+
+Batching many URIs into one load job keeps replays from spending a
+load job (and a function invocation) per file.
+
+USAGE:
+    python replay_quarantine.py --project hackathon2025-01 \\
+        --bucket hackathon2025-01-processing-contributor-dev \\
+        --dataset contributor_bronze [--table contributors] [--dry-run]
+=============================================================================
+"""
+
+import argparse
+import json
+import logging
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple
+
+from google.api_core.exceptions import BadRequest, GoogleAPICallError, NotFound
+from google.cloud import bigquery, storage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REASON_SUFFIX = '.reason.json'
+
+# BigQuery accepts at most 10,000 source URIs per load job
+MAX_URIS_PER_LOAD_JOB = 10000
+
+
+def list_quarantined_files(storage_client: storage.Client, bucket_name: str,
+                           prefix: str, dataset_id: str,
+                           table_filter: str = None) -> List[Dict[str, Any]]:
+    """
+    Read the reason records under the quarantine prefix.
+
+    Args:
+        storage_client: GCS client
+        bucket_name: Processing bucket holding the quarantined files
+        prefix: Quarantine prefix
+        dataset_id: Bronze dataset the records must target
+        table_filter: Only return files destined for this table
+
+    Returns:
+        Reason records, each extended with the quarantined blob name
+    """
+    records = []
+    for blob in storage_client.list_blobs(bucket_name, prefix=prefix):
+        if not blob.name.endswith(REASON_SUFFIX):
+            continue
+
+        record = json.loads(blob.download_as_bytes())
+        if table_filter and record['table_name'] != table_filter:
+            continue
+        if record['destination_table'].split('.')[-2] != dataset_id:
+            # Guards against pointing --bucket and --dataset at different domains
+            logger.error(f"Skipping {blob.name}: destination {record['destination_table']} "
+                         f"is not in dataset {dataset_id}")
+            continue
+        if record.get('replayable') is not True:
+            # Raw PII files must go back through the function to be tokenized
+            logger.warning(f"Skipping {blob.name}: re-upload the fixed file to the "
+                           f"staging bucket instead of replaying it")
+            continue
+
+        record['quarantine_name'] = blob.name[:-len(REASON_SUFFIX)]
+        records.append(record)
+
+    return records
+
+
+def group_into_batches(records: List[Dict[str, Any]],
+                       batch_size: int) -> List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Group reason records by destination table and load configuration,
+    then split each group into batches that share a single load job.
+
+    Args:
+        records: Reason records from list_quarantined_files
+        batch_size: Maximum files per load job
+
+    Returns:
+        List of (destination_table, job_config_api_repr, records) batches
+    """
+    groups = defaultdict(list)
+    for record in records:
+        key = (record['destination_table'], json.dumps(record['job_config'], sort_keys=True))
+        groups[key].append(record)
+
+    batches = []
+    for (destination_table, job_config_json), group in groups.items():
+        job_config = json.loads(job_config_json)
+        for start in range(0, len(group), batch_size):
+            batches.append((destination_table, job_config, group[start:start + batch_size]))
+
+    return batches
+
+
+def load_batch(bq_client: bigquery.Client, bucket: storage.Bucket, destination_table: str,
+               job_config: Dict[str, Any],
+               records: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """
+    Load a batch of quarantined files with one load job. If BigQuery rejects
+    the batch or a file is missing, split it in half and retry so that one
+    file that is still broken does not hold back the rest. Any other API
+    error marks the whole batch as failed.
+
+    Args:
+        bq_client: BigQuery client
+        bucket: Processing bucket holding the quarantined files
+        destination_table: Fully qualified table recorded at quarantine time
+        job_config: Load job configuration in API representation
+        records: Reason records in this batch
+
+    Returns:
+        Tuple of (replayed blob names, still failing blob names)
+    """
+    source_uris = [f"gs://{bucket.name}/{record['quarantine_name']}" for record in records]
+    try:
+        load_job = bq_client.load_table_from_uri(
+            source_uris,
+            destination_table,
+            job_config=bigquery.LoadJobConfig.from_api_repr(job_config)
+        )
+        load_job.result()
+    except (BadRequest, NotFound) as e:
+        if len(records) == 1:
+            logger.error(f"Replay failed for {source_uris[0]}: {str(e)}")
+            return [], [records[0]['quarantine_name']]
+
+        middle = len(records) // 2
+        left_ok, left_failed = load_batch(bq_client, bucket, destination_table,
+                                          job_config, records[:middle])
+        right_ok, right_failed = load_batch(bq_client, bucket, destination_table,
+                                            job_config, records[middle:])
+        return left_ok + right_ok, left_failed + right_failed
+    except GoogleAPICallError as e:
+        logger.error(f"Replay failed for {len(records)} files into {destination_table}: "
+                     f"{str(e)}")
+        return [], [record['quarantine_name'] for record in records]
+
+    logger.info(f"Replayed {len(records)} files ({load_job.output_rows} rows) into "
+                f"{destination_table}")
+
+    replayed = []
+    for record in records:
+        try:
+            bucket.blob(record['quarantine_name']).delete()
+            bucket.blob(f"{record['quarantine_name']}{REASON_SUFFIX}").delete()
+        except GoogleAPICallError as e:
+            # Already loaded; leaving it would load it twice on the next replay
+            logger.error(f"Replayed gs://{bucket.name}/{record['quarantine_name']} but could "
+                         f"not delete it, remove it by hand: {str(e)}")
+        replayed.append(record['quarantine_name'])
+
+    return replayed, []
+
+
+def replay(project_id: str, bucket_name: str, dataset_id: str, prefix: str,
+           table_filter: str = None, batch_size: int = 100, max_workers: int = 4,
+           max_bad_records: int = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Re-ingest quarantined files into the bronze dataset in parallel batches.
+
+    Args:
+        project_id: GCP project ID
+        bucket_name: Processing bucket holding the quarantined files
+        dataset_id: Bronze dataset the quarantined files must target
+        prefix: Quarantine prefix
+        table_filter: Only replay files destined for this table
+        batch_size: Maximum files per load job
+        max_workers: Load jobs to run in parallel
+        max_bad_records: Override the max_bad_records recorded at quarantine time
+        dry_run: Only report what would be replayed
+
+    Returns:
+        Replay summary
+    """
+    storage_client = storage.Client(project=project_id)
+    bq_client = bigquery.Client(project=project_id)
+    bucket = storage_client.bucket(bucket_name)
+
+    records = list_quarantined_files(storage_client, bucket_name, prefix, dataset_id,
+                                     table_filter)
+    if max_bad_records is not None:
+        for record in records:
+            record['job_config']['load']['maxBadRecords'] = max_bad_records
+
+    batches = group_into_batches(records, min(batch_size, MAX_URIS_PER_LOAD_JOB))
+    logger.info(f"Found {len(records)} quarantined files in {len(batches)} batches")
+
+    summary = {'quarantined': len(records), 'batches': len(batches),
+               'replayed': [], 'failed': []}
+    if dry_run:
+        for destination_table, _, batch in batches:
+            logger.info(f"Would replay {len(batch)} files into {destination_table}")
+        return summary
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(load_batch, bq_client, bucket, destination_table,
+                            job_config, batch)
+            for destination_table, job_config, batch in batches
+        ]
+        for future in as_completed(futures):
+            replayed, failed = future.result()
+            summary['replayed'].extend(replayed)
+            summary['failed'].extend(failed)
+
+    logger.info(f"REPLAY_SUMMARY: {json.dumps(summary)}")
+    return summary
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay quarantined staging files into a bronze dataset")
+    parser.add_argument('--project', required=True, help="GCP project ID")
+    parser.add_argument('--bucket', required=True,
+                        help="Processing bucket holding the quarantined files")
+    parser.add_argument('--dataset', required=True,
+                        help="Bronze dataset the quarantined files must target")
+    parser.add_argument('--prefix', default='quarantine/', help="Quarantine prefix")
+    parser.add_argument('--table', help="Only replay files for this table")
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help="Maximum files per load job")
+    parser.add_argument('--max-workers', type=int, default=4,
+                        help="Load jobs to run in parallel")
+    parser.add_argument('--max-bad-records', type=int,
+                        help="Override max_bad_records for the replay")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="List batches without loading")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    result = replay(
+        project_id=args.project,
+        bucket_name=args.bucket,
+        dataset_id=args.dataset,
+        prefix=args.prefix,
+        table_filter=args.table,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        max_bad_records=args.max_bad_records,
+        dry_run=args.dry_run
+    )
+    sys.exit(1 if result['failed'] else 0)
@@ -0,0 +1,106 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'cf_contributor_staging_to_bronze'))
+
+from pii_tokenization import PII_COLUMNS, tokenize_column, tokenize_stream  # noqa: E402
+
+KEY = b'test-key'
+
+
+def test_names_failing_silver_length_check_are_blanked():
+    names = pd.Series(['A', '  B  ', '', 'Jane Doe', ' jane doe '])
+
+    tokens = tokenize_column(names, 'keyed_hash', KEY)
+
+    assert list(tokens[:3]) == ['', '', '']
+    assert len(tokens[3]) == 32
+    # Normalized like silver's TRIM(UPPER(name)), so both spellings match
+    assert tokens[3] == tokens[4]
+
+
+def test_emails_failing_silver_regex_are_blanked():
+    emails = pd.Series(['bad email@x.com', 'no-at-sign', 'jane@example', '',
+                        'Jane@Example.com', ' jane@example.com'])
+
+    tokens = tokenize_column(emails, 'email', KEY)
+
+    assert list(tokens[:4]) == ['', '', '', '']
+    local, domain = tokens[4].split('@')
+    assert len(local) == 32
+    assert domain == 'example.com'
+    # Silver's regex runs on the untrimmed bronze value, so this one is invalid
+    assert tokens[5] == ''
+
+
+@pytest.mark.parametrize('token_format', ['keyed_hash', 'email'])
+def test_empty_and_all_missing_columns_tokenize_to_blanks(token_format):
+    assert list(tokenize_column(pd.Series([], dtype=object), token_format, KEY)) == []
+    assert list(tokenize_column(pd.Series([None, None], dtype=object),
+                                token_format, KEY)) == ['', '']
+
+
+def test_header_only_file_writes_header():
+    header = 'contributor_id,name,email,created_at\n'
+    target = io.StringIO()
+
+    rows, bad_lines = tokenize_stream(io.StringIO(header), target,
+                                      PII_COLUMNS['contributors'], KEY, max_bad_lines=0)
+
+    assert (rows, bad_lines) == (0, 0)
+    assert target.getvalue() == header
+
+
+CONTRIBUTORS_CSV = (
+    'contributor_id,name,email,created_at\n'
+    'c1,Jane Doe,jane@example.com,2025-01-01\n'
+    'c2,John Roe,john@example.com,2025-01-01,extra\n'
+    'c3,Ann Poe,ann@example.com,2025-01-01\n'
+)
+
+
+def test_malformed_lines_are_skipped_and_counted_within_allowance():
+    target = io.StringIO()
+
+    rows, bad_lines = tokenize_stream(io.StringIO(CONTRIBUTORS_CSV), target,
+                                      PII_COLUMNS['contributors'], KEY, max_bad_lines=1)
+
+    assert (rows, bad_lines) == (2, 1)
+    written = pd.read_csv(io.StringIO(target.getvalue()), dtype=str)
+    assert list(written['contributor_id']) == ['c1', 'c3']
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 200000])
+@pytest.mark.parametrize('bad_row', [0, 1, 2])
+def test_extra_field_rows_are_counted_wherever_they_fall(chunk_rows, bad_row):
+    records = ['c1,Jane Doe,jane@example.com,2025-01-01',
+               'c2,John Roe,john@example.com,2025-01-01',
+               'c3,Ann Poe,ann@example.com,2025-01-01']
+    records[bad_row] += ',extra'
+    source = 'contributor_id,name,email,created_at\n' + '\n'.join(records) + '\n'
+    target = io.StringIO()
+
+    rows, bad_lines = tokenize_stream(io.StringIO(source), target, PII_COLUMNS['contributors'],
+                                      KEY, chunk_rows=chunk_rows, max_bad_lines=1)
+
+    assert (rows, bad_lines) == (2, 1)
+    written = pd.read_csv(io.StringIO(target.getvalue()), dtype=str)
+    assert list(written.columns) == ['contributor_id', 'name', 'email', 'created_at']
+    assert list(written['contributor_id']) == [f'c{i}' for i in (1, 2, 3) if i != bad_row + 1]
+    assert not written['name'].str.contains(' ').any()
+    assert set(written['created_at']) == {'2025-01-01'}
+
+
+def test_malformed_lines_over_allowance_raise():
+    with pytest.raises(pd.errors.ParserError):
+        tokenize_stream(io.StringIO(CONTRIBUTORS_CSV), io.StringIO(),
+                        PII_COLUMNS['contributors'], KEY, max_bad_lines=0)
+
+    with pytest.raises(pd.errors.ParserError):
+        tokenize_stream(io.StringIO(CONTRIBUTORS_CSV), io.StringIO(),
+                        PII_COLUMNS['contributors'], KEY)
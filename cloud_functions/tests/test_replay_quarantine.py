@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+from google.api_core.exceptions import BadRequest, Forbidden, NotFound
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay_quarantine  # noqa: E402
+from replay_quarantine import (  # noqa: E402
+    group_into_batches, list_quarantined_files, load_batch, replay,
+)
+
+JOB_CONFIG = {'load': {'sourceFormat': 'CSV', 'maxBadRecords': 10}}
+
+
+def reason_record(name, table='tasks', dataset='contributor_bronze', job_config=None,
+                  **extra):
+    record = {
+        'table_name': table,
+        'destination_table': f'project.{dataset}.{table}',
+        'job_config': job_config or JOB_CONFIG,
+        'replayable': True,
+        'quarantine_name': f'quarantine/{name}',
+    }
+    record.update(extra)
+    return record
+
+
+def reason_blob(record):
+    blob = mock.Mock()
+    blob.name = f"{record.pop('quarantine_name')}.reason.json"
+    blob.download_as_bytes.return_value = json.dumps(record).encode('utf-8')
+    return blob
+
+
+def fake_bq_client(broken=(), error=None):
+    """BigQuery client whose loads fail if they include a broken file."""
+    client = mock.Mock()
+
+    def load_table_from_uri(source_uris, destination, job_config):
+        job = mock.Mock(output_rows=len(source_uris))
+        if error:
+            job.result.side_effect = error
+        elif any(uri.rsplit('/', 1)[-1] in broken for uri in source_uris):
+            job.result.side_effect = BadRequest('still broken')
+        return job
+
+    client.load_table_from_uri.side_effect = load_table_from_uri
+    return client
+
+
+def fake_bucket():
+    bucket = mock.Mock()
+    bucket.name = 'processing'
+    return bucket
+
+
+def test_list_quarantined_files_skips_other_datasets_and_unreplayable_records():
+    records = [
+        reason_record('tasks_1.csv'),
+        reason_record('tasks_2.csv', dataset='qualityaudit_bronze'),
+        reason_record('contributors_1.csv', table='contributors', replayable=False),
+        reason_record('contributors_2.csv', table='contributors'),
+        reason_record('task_feedback_1.csv', table='task_feedback'),
+    ]
+    del records[3]['replayable']
+    data_blob = mock.Mock()
+    data_blob.name = 'quarantine/tasks_1.csv'
+    storage_client = mock.Mock()
+    storage_client.list_blobs.return_value = [data_blob] + [reason_blob(r) for r in records]
+
+    found = list_quarantined_files(storage_client, 'processing', 'quarantine/',
+                                   'contributor_bronze')
+
+    assert [r['quarantine_name'] for r in found] == ['quarantine/tasks_1.csv',
+                                                     'quarantine/task_feedback_1.csv']
+
+    storage_client.list_blobs.return_value = [reason_blob(reason_record('tasks_1.csv')),
+                                              reason_blob(reason_record(
+                                                  'task_feedback_1.csv',
+                                                  table='task_feedback'))]
+    found = list_quarantined_files(storage_client, 'processing', 'quarantine/',
+                                   'contributor_bronze', table_filter='task_feedback')
+
+    assert [r['table_name'] for r in found] == ['task_feedback']
+
+
+def test_group_into_batches_splits_by_destination_and_config():
+    other_config = {'load': {'sourceFormat': 'NEWLINE_DELIMITED_JSON'}}
+    records = [
+        reason_record('tasks_1.csv'),
+        reason_record('tasks_2.csv'),
+        reason_record('tasks_3.csv'),
+        reason_record('tasks_4.json', job_config=other_config),
+        reason_record('task_feedback_1.csv', table='task_feedback'),
+    ]
+
+    batches = group_into_batches(records, batch_size=2)
+
+    assert [(table, config, [r['quarantine_name'] for r in batch])
+            for table, config, batch in batches] == [
+        ('project.contributor_bronze.tasks', JOB_CONFIG,
+         ['quarantine/tasks_1.csv', 'quarantine/tasks_2.csv']),
+        ('project.contributor_bronze.tasks', JOB_CONFIG, ['quarantine/tasks_3.csv']),
+        ('project.contributor_bronze.tasks', other_config, ['quarantine/tasks_4.json']),
+        ('project.contributor_bronze.task_feedback', JOB_CONFIG,
+         ['quarantine/task_feedback_1.csv']),
+    ]
+
+
+def test_load_batch_bisects_to_isolate_broken_files():
+    records = [reason_record(f'tasks_{i}.csv') for i in range(5)]
+    bq_client = fake_bq_client(broken={'tasks_1.csv', 'tasks_4.csv'})
+    bucket = fake_bucket()
+
+    replayed, failed = load_batch(bq_client, bucket, 'project.contributor_bronze.tasks',
+                                  JOB_CONFIG, records)
+
+    assert sorted(replayed) == ['quarantine/tasks_0.csv', 'quarantine/tasks_2.csv',
+                                'quarantine/tasks_3.csv']
+    assert sorted(failed) == ['quarantine/tasks_1.csv', 'quarantine/tasks_4.csv']
+    deleted = {call.args[0] for call in bucket.blob.call_args_list}
+    assert 'quarantine/tasks_0.csv.reason.json' in deleted
+    assert 'quarantine/tasks_1.csv' not in deleted
+
+
+def test_load_batch_bisects_missing_files():
+    records = [reason_record(f'tasks_{i}.csv') for i in range(2)]
+
+    def load_table_from_uri(source_uris, destination, job_config):
+        job = mock.Mock(output_rows=1)
+        if 'gs://processing/quarantine/tasks_0.csv' in source_uris:
+            job.result.side_effect = NotFound('no such object')
+        return job
+
+    bq_client = mock.Mock()
+    bq_client.load_table_from_uri.side_effect = load_table_from_uri
+
+    replayed, failed = load_batch(bq_client, fake_bucket(),
+                                  'project.contributor_bronze.tasks', JOB_CONFIG, records)
+
+    assert (replayed, failed) == (['quarantine/tasks_1.csv'], ['quarantine/tasks_0.csv'])
+
+
+def test_load_batch_marks_batch_failed_on_other_api_errors():
+    records = [reason_record(f'tasks_{i}.csv') for i in range(3)]
+    bucket = fake_bucket()
+
+    replayed, failed = load_batch(fake_bq_client(error=Forbidden('denied')), bucket,
+                                  'project.contributor_bronze.tasks', JOB_CONFIG, records)
+
+    assert replayed == []
+    assert failed == [r['quarantine_name'] for r in records]
+    bucket.blob.assert_not_called()
+
+
+def test_replay_reports_every_batch_when_one_fails(monkeypatch):
+    records = [reason_record('tasks_1.csv'),
+               reason_record('task_feedback_1.csv', table='task_feedback')]
+    storage_client = mock.Mock()
+    storage_client.list_blobs.return_value = [reason_blob(dict(r)) for r in records]
+    storage_client.bucket.return_value = fake_bucket()
+
+    def load_table_from_uri(source_uris, destination, job_config):
+        job = mock.Mock(output_rows=1)
+        if destination.endswith('.task_feedback'):
+            job.result.side_effect = Forbidden('denied')
+        return job
+
+    bq_client = mock.Mock()
+    bq_client.load_table_from_uri.side_effect = load_table_from_uri
+    monkeypatch.setattr(replay_quarantine.storage, 'Client', lambda project: storage_client)
+    monkeypatch.setattr(replay_quarantine.bigquery, 'Client', lambda project: bq_client)
+
+    summary = replay('project', 'processing', 'contributor_bronze', 'quarantine/')
+
+    assert summary['replayed'] == ['quarantine/tasks_1.csv']
+    assert summary['failed'] == ['quarantine/task_feedback_1.csv']
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_replay_dry_run_loads_nothing(monkeypatch, batch_size):
+    storage_client = mock.Mock()
+    storage_client.list_blobs.return_value = [reason_blob(reason_record(f'tasks_{i}.csv'))
+                                              for i in range(3)]
+    bq_client = mock.Mock()
+    monkeypatch.setattr(replay_quarantine.storage, 'Client', lambda project: storage_client)
+    monkeypatch.setattr(replay_quarantine.bigquery, 'Client', lambda project: bq_client)
+
+    summary = replay('project', 'processing', 'contributor_bronze', 'quarantine/',
+                     batch_size=batch_size, dry_run=True)
+
+    assert (summary['quarantined'], summary['batches']) == (3, 3 // batch_size)
+    bq_client.load_table_from_uri.assert_not_called()
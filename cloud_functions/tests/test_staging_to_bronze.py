@@ -0,0 +1,133 @@
+import importlib.util
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+from google.api_core.exceptions import Conflict
+from google.cloud import bigquery
+from google.cloud.exceptions import NotFound
+
+CLOUD_FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CLOUD_FUNCTIONS_DIR, 'cf_contributor_staging_to_bronze'))
+
+DOMAINS = ['contributor', 'qualityaudit', 'programops']
+
+
+def load_function(domain):
+    """Import a function's main.py under a unique module name."""
+    path = os.path.join(CLOUD_FUNCTIONS_DIR, f'cf_{domain}_staging_to_bronze', 'main.py')
+    spec = importlib.util.spec_from_file_location(f'{domain}_staging_to_bronze', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(params=DOMAINS)
+def function(request, monkeypatch):
+    module = load_function(request.param)
+    monkeypatch.setattr(module, 'PROJECT_ID', 'project')
+    monkeypatch.setattr(module, 'DATASET_ID', f'{request.param}_bronze')
+    monkeypatch.setattr(module, 'PROCESSING_BUCKET', 'processing')
+    return module
+
+
+def fake_storage_client():
+    buckets = {}
+
+    def bucket(name):
+        if name not in buckets:
+            buckets[name] = mock.Mock()
+            buckets[name].name = name
+        return buckets[name]
+
+    client = mock.Mock()
+    client.bucket.side_effect = bucket
+    return client, buckets
+
+
+def test_summarize_load_errors_keeps_row_details_and_caps_length(function):
+    errors = [{'reason': 'invalid', 'location': f'line {i}', 'message': 'bad row',
+               'debugInfo': 'internal'} for i in range(function.MAX_LOGGED_LOAD_ERRORS + 5)]
+
+    summary = function.summarize_load_errors(errors)
+
+    assert function.summarize_load_errors(None) == []
+    assert len(summary) == function.MAX_LOGGED_LOAD_ERRORS
+    assert summary[0] == {'reason': 'invalid', 'location': 'line 0', 'message': 'bad row'}
+
+
+def test_quarantine_file_moves_file_next_to_reason_record(function, monkeypatch):
+    storage_client, buckets = fake_storage_client()
+    monkeypatch.setattr(function.storage, 'Client', lambda project: storage_client)
+    job_config = bigquery.LoadJobConfig(max_bad_records=10)
+    load_job = mock.Mock(job_id='job-1', errors=[{'reason': 'invalid', 'location': 'line 2',
+                                                  'message': 'bad row'}])
+
+    function.quarantine_file('staging', 'tasks_1.csv', 'tasks', job_config, load_job,
+                             'too many bad rows', 'event-1')
+
+    staging, processing = buckets['staging'], buckets['processing']
+    staging.copy_blob.assert_called_once_with(staging.blob.return_value, processing,
+                                              'quarantine/tasks_1.csv')
+    processing.blob.assert_called_once_with('quarantine/tasks_1.csv.reason.json')
+    record = json.loads(processing.blob.return_value.upload_from_string.call_args.args[0])
+    assert record['destination_table'] == f'project.{function.DATASET_ID}.tasks'
+    assert record['quarantine_uri'] == 'gs://processing/quarantine/tasks_1.csv'
+    assert record['job_config'] == job_config.to_api_repr()
+    assert record['load_errors'] == load_job.errors
+    assert record['replayable'] is True
+    staging.blob.return_value.delete.assert_called_once_with()
+
+
+def test_quarantine_file_is_a_no_op_when_already_moved(function, monkeypatch):
+    storage_client, buckets = fake_storage_client()
+    monkeypatch.setattr(function.storage, 'Client', lambda project: storage_client)
+    storage_client.bucket('staging').copy_blob.side_effect = NotFound('gone')
+
+    function.quarantine_file('staging', 'tasks_1.csv', 'tasks', bigquery.LoadJobConfig(),
+                             mock.Mock(job_id='job-1', errors=None), 'rejected', 'event-1')
+
+    buckets['processing'].blob.assert_not_called()
+    buckets['staging'].blob.return_value.delete.assert_not_called()
+
+
+def test_raw_pii_files_are_quarantined_as_not_replayable(monkeypatch):
+    function = load_function('contributor')
+    monkeypatch.setattr(function, 'PROCESSING_BUCKET', 'processing')
+    storage_client, buckets = fake_storage_client()
+    monkeypatch.setattr(function.storage, 'Client', lambda project: storage_client)
+
+    for file_name, replayable in [('contributors_1.csv', False),
+                                  ('tokenized/contributors_1.csv', True)]:
+        function.quarantine_file('processing', file_name, 'contributors',
+                                 bigquery.LoadJobConfig(), None, 'malformed', 'event-1')
+        upload = buckets['processing'].blob.return_value.upload_from_string
+        assert json.loads(upload.call_args.args[0])['replayable'] is replayable
+
+
+def test_start_load_job_reuses_job_of_redelivered_event(function):
+    client = mock.Mock()
+    client.load_table_from_uri.side_effect = Conflict('already exists')
+    client.get_dataset.return_value.location = 'us-central1'
+    table_ref = bigquery.DatasetReference('project', function.DATASET_ID).table('tasks')
+
+    load_job = function.start_load_job(client, 'gs://staging/tasks_1.csv', table_ref,
+                                       bigquery.LoadJobConfig(), '1234567890')
+
+    job_id = client.load_table_from_uri.call_args.kwargs['job_id']
+    assert job_id == f'{function.DATASET_ID}_tasks_1234567890'
+    client.get_job.assert_called_once_with(job_id, location='us-central1')
+    assert load_job is client.get_job.return_value
+
+
+def test_start_load_job_without_event_lets_bigquery_pick_job_id(function):
+    client = mock.Mock()
+    table_ref = bigquery.DatasetReference('project', function.DATASET_ID).table('tasks')
+
+    load_job = function.start_load_job(client, 'gs://staging/tasks_1.csv', table_ref,
+                                       bigquery.LoadJobConfig(), None)
+
+    assert client.load_table_from_uri.call_args.kwargs['job_id'] is None
+    assert load_job is client.load_table_from_uri.return_value
@@ -1,6 +1,10 @@
 -- Data Mart Views
 -- These views provide curated data access for specific teams
 -- Each team's service account has access only to their respective mart dataset
+-- Contributor name/email in files loaded by the contributor ingestion function
+-- are tokenized (keyed hashes; emails keep their domain). Rows from the
+-- contributor_db Datastream stream and rows loaded before tokenization was
+-- enabled still hold raw values, so these columns remain Restricted PII
 
 -- =============================================================================
 -- Apple Maps Mart Views
@@ -70,8 +70,11 @@ resource "google_cloudfunctions_function" "cf_contributor_staging_to_bronze" {
   region      = var.region
   description = "Processes contributor staging files and loads them into BigQuery bronze dataset"
 
-  runtime     = "python39"
-  entry_point = "main"
+  runtime             = "python39"
+  entry_point         = "main"
+  available_memory_mb = 1024
+  # Gen1 maximum; contributor files are tokenized in-function before loading
+  timeout = 540
 
   source_archive_bucket = google_storage_bucket.function_source[0].name
   source_archive_object = google_storage_bucket_object.cf_contributor_source[0].name
@@ -79,6 +82,12 @@ resource "google_cloudfunctions_function" "cf_contributor_staging_to_bronze" {
   event_trigger {
     event_type = "google.storage.object.finalize"
     resource   = google_storage_bucket.staging_contributor.name
+
+    # Transient failures are retried (load job IDs derive from the event ID, so a
+    # retry never appends a file twice); rejected files are quarantined and acknowledged
+    failure_policy {
+      retry = true
+    }
   }
 
   environment_variables = {
@@ -89,6 +98,18 @@ resource "google_cloudfunctions_function" "cf_contributor_staging_to_bronze" {
       "tasks"         = "tasks"
       "task_feedback" = "task_feedback"
     })
+    MAX_BAD_RECORDS    = var.max_bad_records
+    QUARANTINE_PREFIX  = var.quarantine_prefix
+    PROCESSING_BUCKET  = google_storage_bucket.processing_contributor.name
+    TOKENIZED_PREFIX   = "tokenized/"
+    MAX_TOKENIZE_BYTES = 1073741824
+  }
+
+  # Key for deterministic PII tokens; rotating it changes every token
+  secret_environment_variables {
+    key     = "PII_TOKENIZATION_KEY"
+    secret  = var.secret_pii_tokenization_key
+    version = "latest"
   }
 
   service_account_email = google_service_account.cf_contributor.email
@@ -102,7 +123,8 @@ resource "google_cloudfunctions_function" "cf_contributor_staging_to_bronze" {
 
   depends_on = [
     google_bigquery_dataset.contributor_bronze,
-    google_storage_bucket.staging_contributor
+    google_storage_bucket.staging_contributor,
+    google_storage_bucket.processing_contributor
   ]
 }
 
@@ -123,6 +145,12 @@ resource "google_cloudfunctions_function" "cf_qualityaudit_staging_to_bronze" {
   event_trigger {
     event_type = "google.storage.object.finalize"
     resource   = google_storage_bucket.staging_qualityaudit.name
+
+    # Transient failures are retried (load job IDs derive from the event ID, so a
+    # retry never appends a file twice); rejected files are quarantined and acknowledged
+    failure_policy {
+      retry = true
+    }
   }
 
   environment_variables = {
@@ -132,6 +160,9 @@ resource "google_cloudfunctions_function" "cf_qualityaudit_staging_to_bronze" {
       "audits"       = "audits"
       "audit_issues" = "audit_issues"
     })
+    MAX_BAD_RECORDS   = var.max_bad_records
+    QUARANTINE_PREFIX = var.quarantine_prefix
+    PROCESSING_BUCKET = google_storage_bucket.processing_qualityaudit.name
   }
 
   service_account_email = google_service_account.cf_qualityaudit.email
@@ -145,7 +176,8 @@ resource "google_cloudfunctions_function" "cf_qualityaudit_staging_to_bronze" {
 
   depends_on = [
     google_bigquery_dataset.qualityaudit_bronze,
-    google_storage_bucket.staging_qualityaudit
+    google_storage_bucket.staging_qualityaudit,
+    google_storage_bucket.processing_qualityaudit
   ]
 }
 
@@ -166,6 +198,12 @@ resource "google_cloudfunctions_function" "cf_programops_staging_to_bronze" {
   event_trigger {
     event_type = "google.storage.object.finalize"
     resource   = google_storage_bucket.staging_programops.name
+
+    # Transient failures are retried (load job IDs derive from the event ID, so a
+    # retry never appends a file twice); rejected files are quarantined and acknowledged
+    failure_policy {
+      retry = true
+    }
   }
 
   environment_variables = {
@@ -175,6 +213,9 @@ resource "google_cloudfunctions_function" "cf_programops_staging_to_bronze" {
       "program_metadata"  = "program_metadata"
       "acknowledgements" = "acknowledgements"
     })
+    MAX_BAD_RECORDS   = var.max_bad_records
+    QUARANTINE_PREFIX = var.quarantine_prefix
+    PROCESSING_BUCKET = google_storage_bucket.processing_programops.name
   }
 
   service_account_email = google_service_account.cf_programops.email
@@ -188,6 +229,7 @@ resource "google_cloudfunctions_function" "cf_programops_staging_to_bronze" {
 
   depends_on = [
     google_bigquery_dataset.programops_bronze,
-    google_storage_bucket.staging_programops
+    google_storage_bucket.staging_programops,
+    google_storage_bucket.processing_programops
   ]
 }
@@ -86,6 +86,99 @@ resource "google_storage_bucket" "staging_programops" {
   }
 }
 
+# Processing bucket for quarantined and PII-tokenized contributor files. It has no function trigger,
+# so objects written here don't start extra invocations.
+resource "google_storage_bucket" "processing_contributor" {
+  name     = "${var.project_id}-processing-contributor-${var.env}"
+  location = var.region
+  project  = var.project_id
+
+  labels = {
+    owner       = "de-platform"
+    environment = var.env
+    team        = "data-platform"
+    purpose     = "processing"
+    data_domain = "contributor"
+  }
+
+  uniform_bucket_level_access = true
+  
+  lifecycle_rule {
+    condition {
+      age = 30
+    }
+    action {
+      type = "Delete"
+    }
+  }
+
+  versioning {
+    enabled = false
+  }
+}
+
+# Processing bucket for quarantined qualityaudit files. It has no function trigger,
+# so objects written here don't start extra invocations.
+resource "google_storage_bucket" "processing_qualityaudit" {
+  name     = "${var.project_id}-processing-qualityaudit-${var.env}"
+  location = var.region
+  project  = var.project_id
+
+  labels = {
+    owner       = "de-platform"
+    environment = var.env
+    team        = "data-platform"
+    purpose     = "processing"
+    data_domain = "qualityaudit"
+  }
+
+  uniform_bucket_level_access = true
+  
+  lifecycle_rule {
+    condition {
+      age = 30
+    }
+    action {
+      type = "Delete"
+    }
+  }
+
+  versioning {
+    enabled = false
+  }
+}
+
+# Processing bucket for quarantined programops files. It has no function trigger,
+# so objects written here don't start extra invocations.
+resource "google_storage_bucket" "processing_programops" {
+  name     = "${var.project_id}-processing-programops-${var.env}"
+  location = var.region
+  project  = var.project_id
+
+  labels = {
+    owner       = "de-platform"
+    environment = var.env
+    team        = "data-platform"
+    purpose     = "processing"
+    data_domain = "programops"
+  }
+
+  uniform_bucket_level_access = true
+  
+  lifecycle_rule {
+    condition {
+      age = 30
+    }
+    action {
+      type = "Delete"
+    }
+  }
+
+  versioning {
+    enabled = false
+  }
+}
+
 # IAM bindings for staging buckets
 
 # Admin group gets storage admin on all staging buckets
@@ -144,3 +237,59 @@ resource "google_storage_bucket_iam_member" "cf_programops_read" {
   role   = "roles/storage.objectViewer"
   member = "serviceAccount:${google_service_account.cf_programops.email}"
 }
+
+# Cloud Function SAs delete rejected files from their staging bucket after quarantining them
+resource "google_storage_bucket_iam_member" "cf_contributor_quarantine" {
+  bucket = google_storage_bucket.staging_contributor.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cf_contributor.email}"
+}
+
+resource "google_storage_bucket_iam_member" "cf_qualityaudit_quarantine" {
+  bucket = google_storage_bucket.staging_qualityaudit.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cf_qualityaudit.email}"
+}
+
+resource "google_storage_bucket_iam_member" "cf_programops_quarantine" {
+  bucket = google_storage_bucket.staging_programops.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cf_programops.email}"
+}
+
+# Processing buckets: admins manage them, each Cloud Function SA writes quarantined files to its own
+resource "google_storage_bucket_iam_member" "processing_contributor_admin" {
+  bucket = google_storage_bucket.processing_contributor.name
+  role   = "roles/storage.admin"
+  member = "group:${var.group_admins}"
+}
+
+resource "google_storage_bucket_iam_member" "cf_contributor_processing" {
+  bucket = google_storage_bucket.processing_contributor.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cf_contributor.email}"
+}
+
+resource "google_storage_bucket_iam_member" "processing_qualityaudit_admin" {
+  bucket = google_storage_bucket.processing_qualityaudit.name
+  role   = "roles/storage.admin"
+  member = "group:${var.group_admins}"
+}
+
+resource "google_storage_bucket_iam_member" "cf_qualityaudit_processing" {
+  bucket = google_storage_bucket.processing_qualityaudit.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cf_qualityaudit.email}"
+}
+
+resource "google_storage_bucket_iam_member" "processing_programops_admin" {
+  bucket = google_storage_bucket.processing_programops.name
+  role   = "roles/storage.admin"
+  member = "group:${var.group_admins}"
+}
+
+resource "google_storage_bucket_iam_member" "cf_programops_processing" {
+  bucket = google_storage_bucket.processing_programops.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cf_programops.email}"
+}
@@ -228,3 +228,11 @@ resource "google_secret_manager_secret_iam_member" "datastream_programops_secret
   member    = "serviceAccount:${google_service_account.datastream_programops.email}"
   project   = var.project_id
 }
+
+# Secret Manager access for the contributor Cloud Function PII tokenization key
+resource "google_secret_manager_secret_iam_member" "cf_contributor_pii_key_secret" {
+  secret_id = var.secret_pii_tokenization_key
+  role      = "roles/secretmanager.secretAccessor"
+  member    = "serviceAccount:${google_service_account.cf_contributor.email}"
+  project   = var.project_id
+}
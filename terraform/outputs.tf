@@ -46,6 +46,9 @@ output "gcs_buckets" {
     staging_contributor  = google_storage_bucket.staging_contributor.name
     staging_qualityaudit = google_storage_bucket.staging_qualityaudit.name
     staging_programops   = google_storage_bucket.staging_programops.name
+    processing_contributor  = google_storage_bucket.processing_contributor.name
+    processing_qualityaudit = google_storage_bucket.processing_qualityaudit.name
+    processing_programops   = google_storage_bucket.processing_programops.name
     function_source      = var.enable_cloud_functions ? google_storage_bucket.function_source[0].name : null
   }
 }
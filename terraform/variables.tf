@@ -40,6 +40,13 @@ variable "secret_programops_db" {
   default     = "programops-mongo-connection"
 }
 
+# Secret Manager secret name for the contributor PII tokenization key
+variable "secret_pii_tokenization_key" {
+  description = "Secret Manager secret name for the key used to tokenize contributor PII"
+  type        = string
+  default     = "contributor-pii-tokenization-key"
+}
+
 # IAM Groups
 variable "group_admins" {
   description = "Admin group email"
@@ -59,6 +66,19 @@ variable "group_analysts" {
   default     = "group-analysts@example.com"
 }
 
+# Staging load failure handling
+variable "max_bad_records" {
+  description = "Bad rows a staging load may skip before the file is quarantined"
+  type        = number
+  default     = 10
+}
+
+variable "quarantine_prefix" {
+  description = "Processing bucket prefix where rejected files and their reason records are moved"
+  type        = string
+  default     = "quarantine/"
+}
+
 # Optional flags
 variable "enable_datastream" {
   description = "Enable Datastream resources (requires additional setup)"